@@ -5,14 +5,17 @@ import re
 # -----------------------------------------------------------------------------
 # Replace Multiple Words
 
-TEXT_REPLACE_REGEX = (
-    ("\\b" "data type" "\\b", "data-type"),
-    ("\\b" "copy on write" "\\b", "copy-on-write"),
-    ("\\b" "key word" "\\b", "keyword"),
-)
-TEXT_REPLACE_REGEX = tuple(
-    (re.compile(match), replacement)
-    for (match, replacement) in TEXT_REPLACE_REGEX
+TEXT_REPLACE = {
+    "data type": "data-type",
+    "copy on write": "copy-on-write",
+    "key word": "keyword",
+}
+# Match all phrases in a single pass, longest first so a phrase can't be shadowed by a shorter one it starts with.
+# Phrases that replace themselves are left out as there's nothing to do (`(?!)` never matches, for an empty table).
+TEXT_REPLACE_REGEX = re.compile(
+    "\\b(?:" + ("|".join(
+        re.escape(match) for match in sorted(TEXT_REPLACE, key=len, reverse=True) if TEXT_REPLACE[match] != match
+    ) or "(?!)") + ")\\b"
 )
 
 
@@ -28,15 +31,19 @@ WORD_REPLACE = {
     # It's also possible to ignore words entirely.
     "um": "",
 }
+# Words that replace themselves are only there to document they're left as-is, drop them to keep lookups small.
+WORD_REPLACE = {match: replacement for match, replacement in WORD_REPLACE.items() if match != replacement}
+
+
+def _word_replace(w):
+    w_test = WORD_REPLACE.get(w)
+    if w_test is not None:
+        return w_test
+    # Partial words can be replaced too, e.g. "i'm" -> "I'm".
+    if w.startswith("i'"):
+        return "I" + w[1:]
+    return w
 
-# Regular expressions allow partial words to be replaced.
-WORD_REPLACE_REGEX = (
-    ("^i'(.*)", "I'\\1"),
-)
-WORD_REPLACE_REGEX = tuple(
-    (re.compile(match), replacement)
-    for (match, replacement) in WORD_REPLACE_REGEX
-)
 
 # -----------------------------------------------------------------------------
 # Add Punctuation
@@ -52,37 +59,28 @@ OPENING_PUNCTUATION = {
     "open quote": '"',
 }
 
+# Closing punctuation removes the space before it, opening punctuation the space after it.
+# All closing punctuation is applied before opening punctuation (`(?!)` never matches, for an empty table).
+CLOSING_PUNCTUATION_REGEX = re.compile(
+    " (" +
+    ("|".join(re.escape(match) for match in sorted(CLOSING_PUNCTUATION, key=len, reverse=True)) or "(?!)") +
+    ")\\b"
+)
+OPENING_PUNCTUATION_REGEX = re.compile(
+    "\\b(" +
+    ("|".join(re.escape(match) for match in sorted(OPENING_PUNCTUATION, key=len, reverse=True)) or "(?!)") +
+    ") "
+)
+
 # -----------------------------------------------------------------------------
 # Main Processing Function
 
 def nerd_dictation_process(text):
 
-    for match, replacement in TEXT_REPLACE_REGEX:
-        text = match.sub(replacement, text)
-
-    for match, replacement in CLOSING_PUNCTUATION.items():
-        text = text.replace(" " + match, replacement)
-
-    for match, replacement in OPENING_PUNCTUATION.items():
-        text = text.replace(match + " ", replacement)
+    text = TEXT_REPLACE_REGEX.sub(lambda match: TEXT_REPLACE[match.group(0)], text)
 
-    words = text.split(" ")
-
-    for i, w in enumerate(words):
-        w_init = w
-        w_test = WORD_REPLACE.get(w)
-        if w_test is not None:
-            w = w_test
-        if w_init == w:
-            for match, replacement in WORD_REPLACE_REGEX:
-                w_test = match.sub(replacement, w)
-                if w_test != w:
-                    w = w_test
-                    break
-
-        words[i] = w
+    text = CLOSING_PUNCTUATION_REGEX.sub(lambda match: CLOSING_PUNCTUATION[match.group(1)], text)
+    text = OPENING_PUNCTUATION_REGEX.sub(lambda match: OPENING_PUNCTUATION[match.group(1)], text)
 
     # Strip any words that were replaced with empty strings.
-    words[:] = [w for w in words if w]
-
-    return " ".join(words)
+    return " ".join(w for w in map(_word_replace, text.split(" ")) if w)
@@ -1 +0,0 @@
-/home/atomrem/.config/nerd-dictation/nerd-dictation.py
\ No newline at end of file
@@ -1,12 +1,35 @@
 # User configuration file with LLM post-processing
 # Located at ~/.config/nerd-dictation/nerd-dictation.py
 
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import os
 import re
 import requests
 import json
+import sqlite3
 import sys
+import threading
 import time
 
+from requests.adapters import HTTPAdapter
+
+# Optional, faster JSON encoding and decoding.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
 # -----------------------------------------------------------------------------
 # LLM Post-Processing Configuration
 
@@ -15,34 +38,268 @@ OLLAMA_URL = "http://localhost:11434/api/generate"
 # OLLAMA_MODEL = "mistral:7b-instruct"
 OLLAMA_MODEL = "phi3.5:3.8b-mini-instruct-q6_K"
 OLLAMA_TIMEOUT = 10  # seconds
+OLLAMA_NUM_PARALLEL = 4  # Concurrent requests for `improve_texts_with_llm`, match the server's OLLAMA_NUM_PARALLEL
+LLM_BATCH_MAX_SIZE = 8  # Texts for each request of `improve_batch_with_llm`, larger batches are split
+
+# Reuse connections to Ollama (HTTP keep-alive) instead of connecting for every request
+# (a streamed response that's abandoned after its first line closes its connection, see `_read_llm_stream`).
+# A single host, keeping one connection for each request that may run at once.
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=OLLAMA_NUM_PARALLEL, max_retries=0))
+
+
+def _session_warm_up() -> None:
+    # Open a connection ahead of the first dictation, any error is left for the first real request to report.
+    try:
+        _SESSION.head(OLLAMA_URL.split("/api/", 1)[0] + "/", timeout=OLLAMA_TIMEOUT)
+    except requests.exceptions.RequestException:
+        pass
+
+
+threading.Thread(target=_session_warm_up, daemon=True).start()
+
+# Prompt for a single text, the text goes between the prefix and suffix.
+_LLM_PROMPT_PREFIX = """
+    You are a helpful assistant that fixes speech recognition errors.
+    
+    You will be given a text (partial or full sentence) that has been transcribed from speech by a software engineer who is not a native English speaker.
+    
+    Your task is to fix only obvious speech recognition errors.
+    
+    DO NOT change technical terms, proper nouns, or already correct formatting.
+
+    Return the same text with only minimal speech recognition fixes.
+
+Text: """
+_LLM_PROMPT_SUFFIX = """
+Fixed:"""
+
+# Request for a single text, everything except the prompt is the same for every request.
+_LLM_REQUEST = {
+    "model": OLLAMA_MODEL,
+    "stream": True,  # Stop reading as soon as the fixed text is complete
+    "options": {
+        "temperature": 0.1,  # Extremely low temperature for conservative corrections
+        "top_p": 0.7,
+        "num_predict": 128,  # Shorter responses to prevent over-elaboration
+        "stop": ["\n\n", "Text:"],  # Let Ollama stop generating commentary too
+    },
+}
+# The encoded request before and after the text in the prompt, so only the text needs to be encoded for each request.
+# The prompt prefix is identical in every request, letting Ollama reuse what it evaluated for the previous one.
+_LLM_REQUEST_PREFIX = (
+    json.dumps(_LLM_REQUEST, separators=(",", ":"))[:-1].encode() +
+    b',"prompt":' +
+    json.dumps(_LLM_PROMPT_PREFIX).encode()[:-1]
+)
+_LLM_REQUEST_SUFFIX = json.dumps(_LLM_PROMPT_SUFFIX).encode()[1:] + b"}"
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 # LLM post-processing settings
 LLM_ENABLED = True
 LLM_MIN_WORDS = 3  # Only process with LLM if text has at least this many words
+# Technical terms the LLM is told to leave alone, text that's mostly made of these isn't worth a request.
+LLM_PRESERVED_WORDS = (
+    "api", "css", "git", "html", "http", "json", "linux", "mysql", "npm", "python", "sql", "url", "yaml",
+)
+LLM_PRESERVED_RATIO = 0.6  # Skip the LLM when at least this fraction of the words are preserved words
+_LLM_PRESERVED_WORD_RE = re.compile(
+    r'\b(?:' + '|'.join(re.escape(word) for word in LLM_PRESERVED_WORDS) + r')\b', re.IGNORECASE
+)
 
-# Cache to prevent multiple LLM processing of the same text
-_llm_cache = {}  # Cleared cache for conservative prompt
+# Cache to prevent multiple LLM processing of the same text,
+# maps text to its (expiry time, improved text), least recently used entries are evicted first.
+_llm_cache: "collections.OrderedDict[str, Tuple[Optional[float], str]]" = collections.OrderedDict()
 _last_processed_text = ""
 LLM_CACHE_MAX_SIZE = 100  # Limit cache size to prevent memory issues
+LLM_CACHE_TTL = None  # Seconds before cached results expire, None to keep them until evicted
+# Keep cached results on disk so they're available to later dictation sessions,
+# e.g. `os.path.expanduser("~/.cache/nerd-dictation/llm-cache.sqlite")`.
+# Disabled by default as this stores the dictated text.
+LLM_CACHE_PATH = None
+
+# Hashes of texts the LLM returned unchanged, these are skipped without a request.
+# Much cheaper per entry than `_llm_cache` so it can remember far more texts.
+_llm_unchanged = set()
+LLM_UNCHANGED_MAX_SIZE = 4096
 
 # Debouncing to prevent rapid LLM calls
-_last_llm_call_time = 0
+_last_llm_call_mono = 0.0
 LLM_DEBOUNCE_DELAY = 2  # 2000ms minimum between LLM calls
 
+# Run LLM requests on a background thread so dictation never waits for Ollama,
+# the improved text is returned once the request is done (by a later call for the same text).
+# Only useful with `--progressive`, otherwise the text is processed once and typed without waiting for the LLM.
+LLM_BACKGROUND = False
+_LLM_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+_llm_inflight: "Dict[str, concurrent.futures.Future[str]]" = {}
+# Guards the in-memory cache, `_llm_inflight` and debouncing, shared by concurrent and background requests.
+# Re-entrant as callbacks of futures that are already done run immediately.
+_llm_lock = threading.RLock()
+
 # Progressive text detection
 _last_llm_processed_text = ""
+# `_last_llm_processed_text` without trailing punctuation, so progressive text can extend it.
+_last_llm_processed_stem = ""
 MIN_TEXT_LENGTH_FOR_LLM = 15  # Minimum characters before considering LLM processing
+# The last input the LLM improved and its improved text,
+# reused for progressive typing while the input only grows by a few words.
+_last_improved_input = ""
+_last_improved_output = ""
+# The input `process_incremental` last sent to the LLM (up to the end of the text sent) and its processed text.
+_incremental_input = ""
+_incremental_output = ""
+# Earlier inputs the LLM improved and their improved text, by the start of the input (see `_prefix_key`).
+# Reused for text that extends any of these inputs by a little, not only the last one.
+_prefix_cache: "collections.OrderedDict[str, Tuple[str, str]]" = collections.OrderedDict()
+LLM_PREFIX_CACHE_MAX_SIZE = 32
+LLM_PREFIX_MAX_GROWTH = 1.5  # Text longer than this times the earlier input is sent to the LLM again
+
+# Commentary the LLM sometimes adds to its response, removed by `_clean_llm_output` in this order:
+# text in parentheses that contains explanatory words, then sentences that start with explanatory phrases.
+# (Two passes, as parentheses can contain a period that would end the sentence early.)
+_LLM_COMMENTARY_PAREN_RE = re.compile(
+    r'\s*\([^)]*(?:changes needed|pronunciation|grammar|correct)[^)]*\)', re.IGNORECASE
+)
+_LLM_COMMENTARY_PREFIX_RE = re.compile(
+    r'\s*(?:No changes needed|Pronunciation:|Grammar:|Note:)[^.]*\.?', re.IGNORECASE
+)
+# Runs of whitespace, collapsed into a single space.
+_WS_RE = re.compile(r'\s+')
+
+# Matches the numbered lines of a batched LLM response, see `improve_batch_with_llm`
+_NUMBERED_LINE_RE = re.compile(r'^\s*(\d+)[.)]\s*(.*?)\s*$', re.MULTILINE)
+
+def _cache_db_open(filepath: str) -> sqlite3.Connection:
+    """Open the on-disk LLM cache, removing expired entries"""
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    # Write each statement immediately (no transactions), WAL so writes don't block reads.
+    db = sqlite3.connect(filepath, isolation_level=None, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS llm_cache (text TEXT PRIMARY KEY, improved TEXT NOT NULL, time REAL NOT NULL)"
+    )
+    if LLM_CACHE_TTL is not None:
+        db.execute("DELETE FROM llm_cache WHERE time < ?", (time.time() - LLM_CACHE_TTL,))
+    return db
+
+_llm_cache_db = _cache_db_open(LLM_CACHE_PATH) if LLM_CACHE_PATH else None
+
+def _cache_put_memory(text: str, value: str, ttl: Optional[float]) -> None:
+    """Cache the LLM result for text in memory, evicting the least recently used entry when full"""
+    expire_time = None if ttl is None else time.monotonic() + ttl
+    with _llm_lock:
+        _llm_cache[text] = (expire_time, value)
+        _llm_cache.move_to_end(text)
+        if len(_llm_cache) > LLM_CACHE_MAX_SIZE:
+            _llm_cache.popitem(last=False)
+
+def _cache_db_get(text: str) -> Optional[str]:
+    """Return the LLM result for text from the on-disk cache (loading it into memory) or None"""
+    if _llm_cache_db is None:
+        return None
+    try:
+        row = _llm_cache_db.execute("SELECT improved, time FROM llm_cache WHERE text = ?", (text,)).fetchone()
+    except sqlite3.Error as ex:
+        print(f"LLM cache read failed: {ex}", file=sys.stderr)
+        return None
+    if row is None:
+        return None
+    value, store_time = row
+    ttl = None
+    if LLM_CACHE_TTL is not None:
+        ttl = LLM_CACHE_TTL - (time.time() - store_time)
+        if ttl <= 0:
+            return None
+    _cache_put_memory(text, value, ttl)
+    return value
+
+def _cache_key(text: str) -> str:
+    """Return text with whitespace normalized, so texts that only differ in spacing share a cache entry"""
+    # VOSK separates words with single spaces, only split the text when that's not the case.
+    if "  " in text or text.startswith(" ") or text.endswith(" "):
+        return " ".join(text.split())
+    return text
+
+def _cache_get(text: str) -> Optional[str]:
+    """Return the cached LLM result for text (marking it as recently used) or None"""
+    text = _cache_key(text)
+    with _llm_lock:
+        entry = _llm_cache.get(text)
+        if entry is not None:
+            expire_time, value = entry
+            if expire_time is not None and time.monotonic() >= expire_time:
+                del _llm_cache[text]
+                return None
+            _llm_cache.move_to_end(text)
+            return value
+    return _cache_db_get(text)
+
+def _cache_put(text: str, value: str) -> None:
+    """Cache the LLM result for text, in memory and on disk when enabled"""
+    text = _cache_key(text)
+    _cache_put_memory(text, value, LLM_CACHE_TTL)
+    if _llm_cache_db is not None:
+        try:
+            _llm_cache_db.execute(
+                "INSERT OR REPLACE INTO llm_cache (text, improved, time) VALUES (?, ?, ?)", (text, value, time.time())
+            )
+        except sqlite3.Error as ex:
+            print(f"LLM cache write failed: {ex}", file=sys.stderr)
+
+def _prefix_key(text: str) -> str:
+    """Return the normalized start of text, short enough that every text sent to the LLM has one"""
+    return _WS_RE.sub(' ', text[:MIN_TEXT_LENGTH_FOR_LLM]).lower()
+
+def _prefix_cache_get(text: str) -> Optional[str]:
+    """Return text with the improvement of an earlier input it extends or None"""
+    with _llm_lock:
+        entry = _prefix_cache.get(_prefix_key(text))
+    if entry is None:
+        return None
+    original, improved = entry
+    if not (len(original) < len(text) <= len(original) * LLM_PREFIX_MAX_GROWTH and text.startswith(original)):
+        return None
+    # Only whole words can be added, otherwise the last word of the input has grown.
+    if text[len(original)] != ' ':
+        return None
+    return _extend_improved_text(improved, text[len(original):])
+
+def _prefix_cache_put(text: str, improved_text: str) -> None:
+    """Remember the improvement of text for texts that extend it"""
+    key = _prefix_key(text)
+    with _llm_lock:
+        _prefix_cache[key] = (text, improved_text)
+        _prefix_cache.move_to_end(key)
+        if len(_prefix_cache) > LLM_PREFIX_CACHE_MAX_SIZE:
+            _prefix_cache.popitem(last=False)
+
+def _mark_unchanged(text: str) -> None:
+    """Remember that the LLM returned text unchanged"""
+    with _llm_lock:
+        if len(_llm_unchanged) >= LLM_UNCHANGED_MAX_SIZE:
+            # Evict an arbitrary entry.
+            _llm_unchanged.pop()
+        _llm_unchanged.add(hash(text))
+
+def _is_too_short(text: str) -> bool:
+    """Check if text is too short for the LLM, cheap enough to run before any cache lookup"""
+    # VOSK separates words with single spaces, so counting them avoids splitting the text into a list
+    return len(text) < MIN_TEXT_LENGTH_FOR_LLM or text.count(' ') + 1 < LLM_MIN_WORDS
 
 def should_process_with_llm(text: str) -> bool:
     """Determine if text should be processed with LLM"""
-    global _last_llm_processed_text
-    
     # Skip very short text
-    if len(text.split()) < LLM_MIN_WORDS or len(text) < MIN_TEXT_LENGTH_FOR_LLM:
+    if _is_too_short(text):
+        return False
+    words = text.count(' ') + 1
+
+    # Skip text the LLM would only be asked to preserve
+    if len(_LLM_PRESERVED_WORD_RE.findall(text)) >= words * LLM_PRESERVED_RATIO:
         return False
     
     # Skip if this looks like progressive typing of previously processed text
-    if _last_llm_processed_text and text.startswith(_last_llm_processed_text.rstrip('.,!?')):
+    if _last_llm_processed_text and text.startswith(_last_llm_processed_stem):
         # This appears to be an extension of previously processed text
         return False
     
@@ -52,124 +309,328 @@ def should_process_with_llm(text: str) -> bool:
         
     return True
 
+def _llm_inflight_done(text: str, _future: "concurrent.futures.Future[str]") -> None:
+    """Forget the finished background request for text, its result is in the cache"""
+    with _llm_lock:
+        _llm_inflight.pop(text, None)
+
 def improve_text_with_llm(text: str) -> str:
     """Send text to local Ollama for grammar correction and improvement"""
-    global _last_llm_call_time, _last_llm_processed_text
+    global _last_llm_call_mono
     
     if not LLM_ENABLED:
         return text
+
+    # Partial text early in progressive dictation, skipped without hashing it for the caches
+    if _is_too_short(text):
+        return text
+
+    # Check cache to avoid reprocessing the same text
+    cached_text = _cache_get(text)
+    if cached_text is not None:
+        return cached_text
+
+    # Text extends an earlier input the LLM improved by a little
+    cached_text = _prefix_cache_get(text)
+    if cached_text is not None:
+        return cached_text
+
+    # The LLM didn't change this text before
+    if hash(text) in _llm_unchanged:
+        return text
         
     # Check if we should process this text
     if not should_process_with_llm(text):
         return text
     
-    # Debouncing: prevent rapid successive LLM calls
-    current_time = time.time()
-    if current_time - _last_llm_call_time < LLM_DEBOUNCE_DELAY:
+    with _llm_lock:
+        future = _llm_inflight.get(text)
+        is_owner = future is None
+        if is_owner:
+            # Debouncing: prevent rapid successive LLM calls
+            current_time = time.monotonic()
+            if current_time - _last_llm_call_mono < LLM_DEBOUNCE_DELAY:
+                return text
+            _last_llm_call_mono = current_time
+
+            if LLM_BACKGROUND:
+                # `_request_llm` caches the result for later calls
+                future = _LLM_EXECUTOR.submit(_request_llm, text)
+            else:
+                future = concurrent.futures.Future()
+            _llm_inflight[text] = future
+            future.add_done_callback(functools.partial(_llm_inflight_done, text))
+
+    if LLM_BACKGROUND:
+        # The result of the background request isn't available yet
         return text
-    _last_llm_call_time = current_time
-    
-    # Check cache to avoid reprocessing the same text
-    if text in _llm_cache:
-        return _llm_cache[text]
+
+    if not is_owner:
+        # Another thread is requesting the same text, wait for its result instead of requesting it again
+        return future.result()
+
+    try:
+        improved_text = _request_llm(text)
+    except BaseException as ex:
+        future.set_exception(ex)
+        raise
+    future.set_result(improved_text)
+    return improved_text
+
+def _clean_llm_output(text: str, improved_text: str) -> str:
+    """Strip commentary from an LLM response, returning an empty string when it's not a usable fix of text"""
+    # Remove any quotes that might have been added by the LLM
+    improved_text = improved_text.strip().strip('"\'')
+
+    # Remove common unwanted commentary patterns
+    improved_text = _LLM_COMMENTARY_PAREN_RE.sub('', improved_text)
+    improved_text = _LLM_COMMENTARY_PREFIX_RE.sub('', improved_text)
+
+    # Clean up extra whitespace
+    improved_text = _WS_RE.sub(' ', improved_text).strip()
+
+    # Validate that the result isn't too different in length or empty
+    if improved_text and 0.3 <= len(improved_text) <= len(text) * 2:
+        return improved_text
+    return ""
+
+def _json_dumps(value: Any) -> bytes:
+    """Encode value as JSON, using orjson when it's available"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def _json_loads(data: bytes) -> Any:
+    """Decode JSON, using orjson when it's available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _llm_request_body(text: str) -> bytes:
+    """Return the encoded Ollama request for text"""
+    # The quotes of the encoded text are dropped, it's placed inside the already encoded prompt.
+    return _LLM_REQUEST_PREFIX + _json_dumps(text)[1:-1] + _LLM_REQUEST_SUFFIX
+
+def _store_llm_result(text: str, response_text: str) -> Optional[str]:
+    """
+    Clean up and validate the LLM response for text, caching the result.
+    Returns None when validation failed (the original text is cached instead).
+    """
+    improved_text = _clean_llm_output(text, response_text)
+    if not improved_text:
+        print(f"LLM output validation failed, using original: '{text}'", file=sys.stderr)
+        # Cache the fallback too, the LLM is likely to give the same answer again
+        _cache_put(text, text)
+        return None
+
+    _cache_put(text, improved_text)
+
+    # Log the improvement to stderr for debugging (optional)
+    if improved_text != text:
+        print(f"LLM improved: '{text}' → '{improved_text}'", file=sys.stderr)
+        _prefix_cache_put(text, improved_text)
+    else:
+        _mark_unchanged(text)
+    return improved_text
+
+def _read_llm_stream(response: requests.Response, max_length: Optional[int] = None) -> str:
+    """
+    Read a streamed Ollama response up to the end of its first line.
+    Anything after that is commentary, so there is no need to wait for it to be generated
+    (closing the response closes its connection, which also stops Ollama generating the rest).
+    Returns an empty string once the response grows past max_length, as it can't be a usable fix.
+    """
+    response_text = ""
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = _json_loads(line)
+        if "error" in chunk:
+            raise RuntimeError(chunk["error"])
+        response_text += chunk.get("response", "")
+        # Once done the stream ends right away, reading it to the end keeps the connection for the next request.
+        if chunk.get("done"):
+            continue
+        if "\n" in response_text.lstrip():
+            break
+        if max_length is not None and len(response_text) > max_length:
+            return ""
+    return response_text.lstrip().split("\n", 1)[0]
+
+def _request_llm(text: str) -> str:
+    """Run a single Ollama request for text, caching and validating the result"""
+    global _last_llm_processed_text, _last_llm_processed_stem
+
+    body = _llm_request_body(text)
     
+    try:
+        with _SESSION.post(
+            OLLAMA_URL, data=body, headers=_JSON_HEADERS, timeout=OLLAMA_TIMEOUT, stream=True
+        ) as response:
+            status_code = response.status_code
+            # Validation allows at most twice the length of text, leave room for commentary that's removed.
+            improved_text = _read_llm_stream(response, len(text) * 3) if status_code == 200 else ""
+        if status_code == 200:
+            # Basic validation and cleanup
+            improved_text = _store_llm_result(text, improved_text)
+            if improved_text is None:
+                return text
+            # Update last processed text tracking
+            _last_llm_processed_text = improved_text
+            _last_llm_processed_stem = improved_text.rstrip('.,!?')
+            return improved_text
+        else:
+            # Errors aren't cached so the text can be retried once Ollama is available
+            print(f"LLM API error: {status_code}", file=sys.stderr)
+            return text
+    except Exception as e:
+        print(f"LLM processing failed: {e}", file=sys.stderr)
+        return text
+
+def _request_llm_batch(texts: List[str]) -> Optional[List[str]]:
+    """
+    Run a single Ollama request for all texts, numbering each one in the prompt.
+    Returns None when the request fails or the response can't be matched up with texts.
+    """
+    numbered_texts = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, 1))
     prompt = f"""
     You are a helpful assistant that fixes speech recognition errors.
     
-    You will be given a text (partial or full sentence) that has been transcribed from speech by a software engineer who is not a native English speaker.
+    You will be given numbered texts (partial or full sentences) that have been transcribed from speech by a software engineer who is not a native English speaker.
     
-    Your task is to fix only obvious speech recognition errors.
+    Your task is to fix only obvious speech recognition errors in each text.
     
     DO NOT change technical terms, proper nouns, or already correct formatting.
 
-    Return the same text with only minimal speech recognition fixes.
+    Return each text on its own line with the same number, with only minimal speech recognition fixes.
 
-Text: {text}
+Texts:
+{numbered_texts}
 Fixed:"""
-    
+
     data = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
         "stream": False,
         "options": {
-            "temperature": 0.1,  # Extremely low temperature for conservative corrections
+            "temperature": 0.1,
             "top_p": 0.7,
-            "num_predict": 128,  # Shorter responses to prevent over-elaboration
+            "num_predict": 128 * len(texts),
         }
     }
-    
+
     try:
-        response = requests.post(OLLAMA_URL, 
-                               json=data, 
-                               timeout=OLLAMA_TIMEOUT)
-        if response.status_code == 200:
-            result = response.json()
-            improved_text = result["response"].strip()
-            
-            # Basic validation and cleanup
-            if improved_text and len(improved_text) > 0:
-                # Remove any quotes that might have been added by the LLM
-                improved_text = improved_text.strip('"\'')
-                
-                # Remove common unwanted commentary patterns
-                import re
-                # Remove text in parentheses that contains explanatory words
-                improved_text = re.sub(r'\s*\([^)]*(?:changes needed|pronunciation|grammar|correct)[^)]*\)', '', improved_text, flags=re.IGNORECASE)
-                # Remove sentences that start with explanatory phrases
-                improved_text = re.sub(r'\s*(No changes needed|Pronunciation:|Grammar:|Note:)[^.]*\.?', '', improved_text, flags=re.IGNORECASE)
-                
-                # Clean up extra whitespace
-                improved_text = ' '.join(improved_text.split())
-                
-                # Validate that the result isn't too different in length or empty
-                if improved_text and 0.3 <= len(improved_text) <= len(text) * 2:
-                    # Cache the result (with size limit)
-                    if len(_llm_cache) >= LLM_CACHE_MAX_SIZE:
-                        # Remove oldest entry (simple FIFO)
-                        _llm_cache.pop(next(iter(_llm_cache)))
-                    _llm_cache[text] = improved_text
-                    
-                    # Log the improvement to stderr for debugging (optional)
-                    if improved_text != text:
-                        print(f"LLM improved: '{text}' → '{improved_text}'", file=sys.stderr)
-                    
-                    # Update last processed text tracking
-                    _last_llm_processed_text = improved_text
-                    return improved_text
-                else:
-                    # Validation failed, fall back to original text
-                    print(f"LLM output validation failed, using original: '{text}'", file=sys.stderr)
-                    # Cache the fallback too (with size limit)
-                    if len(_llm_cache) >= LLM_CACHE_MAX_SIZE:
-                        _llm_cache.pop(next(iter(_llm_cache)))
-                    _llm_cache[text] = text
-                    return text
-            else:
-                return text
-        else:
+        # The response is generated for all texts at once, allow as long as a request for each of them.
+        response = _SESSION.post(
+            OLLAMA_URL, data=_json_dumps(data), headers=_JSON_HEADERS, timeout=OLLAMA_TIMEOUT * len(texts)
+        )
+        if response.status_code != 200:
             print(f"LLM API error: {response.status_code}", file=sys.stderr)
-            # Cache the fallback (with size limit)
-            if len(_llm_cache) >= LLM_CACHE_MAX_SIZE:
-                _llm_cache.pop(next(iter(_llm_cache)))
-            _llm_cache[text] = text
-            return text
+            return None
+        lines = _NUMBERED_LINE_RE.findall(_json_loads(response.content)["response"])
     except Exception as e:
-        print(f"LLM processing failed: {e}", file=sys.stderr)
-        # Cache the fallback (with size limit)
-        if len(_llm_cache) >= LLM_CACHE_MAX_SIZE:
-            _llm_cache.pop(next(iter(_llm_cache)))
-        _llm_cache[text] = text
-        return text
+        print(f"LLM batch processing failed: {e}", file=sys.stderr)
+        return None
+
+    if [int(number) for number, _ in lines] != list(range(1, len(texts) + 1)):
+        print(f"LLM batch output didn't match the {len(texts)} input texts", file=sys.stderr)
+        return None
+
+    return [_store_llm_result(text, improved_text) or text for text, (_, improved_text) in zip(texts, lines)]
+
+async def _request_llm_concurrently(texts: List[str]) -> List[str]:
+    """Run Ollama requests for texts concurrently, at most OLLAMA_NUM_PARALLEL at once"""
+    semaphore = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+
+    async def request(text: str) -> str:
+        async with semaphore:
+            return await asyncio.to_thread(_request_llm, text)
+
+    return await asyncio.gather(*(request(text) for text in texts))
+
+def _llm_pending_texts(texts: List[str], results: List[str]) -> Dict[str, List[int]]:
+    """
+    Fill results with cached improvements for texts,
+    returning the texts that need the LLM mapped to the indices they occur at (so duplicates are requested once).
+    """
+    pending: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        cached_text = _cache_get(text)
+        if cached_text is not None:
+            results[i] = cached_text
+        elif hash(text) not in _llm_unchanged and should_process_with_llm(text):
+            pending.setdefault(text, []).append(i)
+    return pending
+
+def improve_texts_with_llm(texts: List[str]) -> List[str]:
+    """
+    Improve multiple texts at once (e.g. a batch of utterances).
+    Requests run concurrently so the total time is bounded by the slowest request, not the sum of all of them.
+    """
+    results = list(texts)
+    if not LLM_ENABLED:
+        return results
+
+    pending = _llm_pending_texts(texts, results)
+    if pending:
+        for text, improved_text in zip(pending, asyncio.run(_request_llm_concurrently(list(pending)))):
+            for i in pending[text]:
+                results[i] = improved_text
+
+    return results
+
+def improve_batch_with_llm(texts: List[str]) -> List[str]:
+    """
+    Improve multiple texts with a single Ollama request for each batch of up to LLM_BATCH_MAX_SIZE texts,
+    avoiding the per-request overhead of ``improve_texts_with_llm`` when the server handles one request at a time.
+    Falls back to one request per text for a batch when its response can't be used.
+    """
+    results = list(texts)
+    if not LLM_ENABLED:
+        return results
+
+    pending = _llm_pending_texts(texts, results)
+    if pending:
+        pending_texts = list(pending)
+        improved_texts = []
+        for start in range(0, len(pending_texts), LLM_BATCH_MAX_SIZE):
+            batch = pending_texts[start:start + LLM_BATCH_MAX_SIZE]
+            improved_batch = _request_llm_batch(batch) if len(batch) > 1 else None
+            if improved_batch is None:
+                improved_batch = asyncio.run(_request_llm_concurrently(batch))
+            improved_texts += improved_batch
+        for text, improved_text in zip(pending_texts, improved_texts):
+            for i in pending[text]:
+                results[i] = improved_text
+
+    return results
 
 # -----------------------------------------------------------------------------
 # Main Processing Function
 
+def _extend_improved_text(improved_text: str, suffix: str) -> str:
+    """Append words typed after the input of improved_text, moving past its trailing punctuation"""
+    if not suffix:
+        return improved_text
+    return improved_text.rstrip('.,!?') + suffix
+
 def nerd_dictation_process(text: str) -> str:
     """
     Main text processing function with LLM.
     LLM handles grammar on raw speech.
     """
-    global _last_processed_text
+    global _last_processed_text, _last_improved_input, _last_improved_output
+
+    # Progressive typing, text extends input the LLM already improved.
+    suffix = None
+    if _last_improved_input and text.startswith(_last_improved_input):
+        suffix = text[len(_last_improved_input):]
+        if suffix and not suffix.startswith(' '):
+            # The last word has grown, the improved text can't be extended.
+            suffix = None
+        # Only a few words were added, keep the improved text instead of sending all of it to the LLM again.
+        elif suffix.count(' ') < LLM_MIN_WORDS:
+            return _extend_improved_text(_last_improved_output, suffix)
     
     # Store original text for cache comparison
     original_text = text
@@ -178,5 +639,54 @@ def nerd_dictation_process(text: str) -> str:
     if original_text != _last_processed_text and original_text.strip():
         text = improve_text_with_llm(text)
         _last_processed_text = original_text  # Use original for comparison
+    elif LLM_BACKGROUND:
+        # Repeated text, use the result of the background request when it's done
+        text = _cache_get(text) or text
+
+    if text != original_text:
+        _last_improved_input = original_text
+        _last_improved_output = text
+    elif suffix is not None:
+        # The LLM didn't improve the whole text (skipped or debounced), keep the improvement of the text it extends
+        text = _extend_improved_text(_last_improved_output, suffix)
     
     return text
+
+def _llm_answered(text: str) -> bool:
+    """Check if the LLM has answered for text, errors aren't cached so failed and skipped requests aren't"""
+    return _cache_get(text) is not None or hash(text) in _llm_unchanged
+
+def process_incremental(prev_text: str, new_text: str) -> str:
+    """
+    Process new_text typed after prev_text (progressive typing),
+    only sending the words added since the last LLM request once there are enough of them,
+    appending the result to the text processed so far instead of sending the whole text again.
+    """
+    global _incremental_input, _incremental_output
+
+    # Start over when the text was changed instead of extended.
+    if not (new_text.startswith(prev_text) and new_text.startswith(_incremental_input)):
+        _incremental_input = _incremental_output = ""
+
+    pending = new_text[len(_incremental_input):]
+    if _incremental_input and not pending:
+        # The same text again.
+        return _incremental_output
+    if _incremental_input and not pending.startswith(' '):
+        # The last word that was sent has grown, send all of the text again.
+        _incremental_input = _incremental_output = ""
+        pending = new_text
+
+    pending_words = pending.lstrip()
+    # Wait for enough text that the LLM won't skip it, otherwise it would be taken as processed.
+    if _is_too_short(pending_words):
+        return _incremental_output + pending
+
+    improved_words = improve_text_with_llm(pending_words)
+    if improved_words == pending_words and not _llm_answered(pending_words):
+        # Debounced, failed or skipped, send it again with the words typed next.
+        return _incremental_output + pending
+
+    _incremental_output += pending[:len(pending) - len(pending_words)] + improved_words
+    _incremental_input = new_text
+    return _incremental_output
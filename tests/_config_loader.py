@@ -0,0 +1,121 @@
+"""
+Load the user configuration for the test scripts, with helpers they share.
+"""
+
+import collections
+import functools
+import importlib.util
+import os
+import sys
+import unittest
+
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from types import (
+    ModuleType,
+)
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+)
+
+CONFIG_PATH = os.path.expanduser("~/.config/nerd-dictation/nerd-dictation.py")
+CONFIG_EXISTS = os.path.exists(CONFIG_PATH)
+# The configuration's global state as loaded, before tests (from any test module in this run) change it.
+config_state: Dict[str, Any] = {}
+
+
+def get_config() -> ModuleType:
+    """
+    Return the configuration at ``CONFIG_PATH``,
+    only executing it the first time (the module is kept in ``sys.modules``).
+    """
+    config = sys.modules.get("nerd_dictation_config")
+    if config is None:
+        spec = importlib.util.spec_from_file_location("nerd_dictation_config", CONFIG_PATH)
+        config = importlib.util.module_from_spec(spec)
+        sys.modules["nerd_dictation_config"] = config
+        try:
+            spec.loader.exec_module(config)
+        except BaseException:
+            # Don't leave a partially initialized module behind.
+            del sys.modules["nerd_dictation_config"]
+            raise
+        config_state.update(vars(config))
+    return config
+
+
+def emit(lines: Iterable[str]) -> None:
+    """
+    Write the lines of a test case report with a single write.
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+@functools.lru_cache(maxsize=None)
+def ollama_available() -> bool:
+    """
+    Return true when the Ollama server used by the configuration is running.
+    """
+    config = get_config()
+    try:
+        config._SESSION.head(config.OLLAMA_URL.split("/api/", 1)[0] + "/", timeout=1)
+    except OSError:
+        return False
+    return True
+
+
+class LLMTestCase(unittest.TestCase):
+    """
+    Tests that send text to Ollama, recording the texts that are sent so tests can check the LLM answered.
+    Each test starts without cached results or progressive typing state, which are restored afterwards.
+    Skipped without a configuration or when Ollama isn't running.
+    """
+
+    config: ModuleType
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        if not CONFIG_EXISTS:
+            raise unittest.SkipTest("Configuration file not found")
+        if not ollama_available():
+            raise unittest.SkipTest("Ollama isn't running")
+        cls.config = get_config()
+
+    def setUp(self) -> None:
+        config = self.config
+        patcher = patch.multiple(
+            config,
+            LLM_DEBOUNCE_DELAY=0,
+            _last_llm_call_mono=0.0,
+            _request_llm=MagicMock(wraps=config._request_llm),
+            _llm_cache=collections.OrderedDict(),
+            _prefix_cache=collections.OrderedDict(),
+            _llm_unchanged=set(),
+            _last_processed_text="",
+            _last_improved_input="",
+            _last_improved_output="",
+            _last_llm_processed_text="",
+            _last_llm_processed_stem="",
+            _incremental_input="",
+            _incremental_output="",
+        )
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.mock_request_llm = config._request_llm
+
+    def assertLLMAnswered(self) -> None:
+        """
+        Check text was sent to the LLM and every request succeeded.
+        """
+        config = self.config
+        requested_texts = [call.args[0] for call in self.mock_request_llm.call_args_list]
+        self.assertTrue(requested_texts, "No text was sent to the LLM")
+        for text in requested_texts:
+            with self.subTest(text=text):
+                # Errors aren't cached, so a request succeeded when its text is in the cache.
+                self.assertIsNotNone(config._cache_get(text), "The LLM request failed")
@@ -3,24 +3,12 @@
 Test script to verify LLM integration doesn't repeatedly process during progressive typing
 """
 
-import sys
-import os
-import importlib.util
-
-# Load config
-config_path = os.path.expanduser('~/.config/nerd-dictation/nerd-dictation.py')
-spec = importlib.util.spec_from_file_location("config", config_path)
-config = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(config)
-
-print("Testing progressive typing scenario...")
-print("This simulates how nerd-dictation processes text during live dictation")
-print("=" * 70)
+from _config_loader import LLMTestCase, get_config
 
 # Simulate progressive text building (like during live dictation)
-progressive_texts = [
+PROGRESSIVE_TEXTS = (
     "this are",
-    "this are a", 
+    "this are a",
     "this are a test",
     "this are a test and",
     "this are a test and i",
@@ -28,19 +16,53 @@ progressive_texts = [
     "this are a test and i want to",
     "this are a test and i want to by",
     "this are a test and i want to by groceries"
-]
-
-print("Simulating progressive typing...")
-for i, text in enumerate(progressive_texts):
-    result = config.nerd_dictation_process(text)
-    print(f"Step {i+1:2d}: '{text}' → '{result}'")
-
-print("\nTesting same text multiple times (should use cache)...")
-test_text = "this are a test"
-for i in range(3):
-    result = config.nerd_dictation_process(test_text)
-    print(f"Call {i+1}: '{test_text}' → '{result}'")
-
-print("\n✓ Progressive typing test completed!")
-print("Look for 'LLM improved' messages in the output above.")
-print("Each unique text should only be processed once by the LLM.")
\ No newline at end of file
+)
+
+
+class TestProgressive(LLMTestCase):
+    """Run the progressive typing scenario as part of a test suite."""
+
+    def test_progressive_typing(self):
+        prev_text = ""
+        for text in PROGRESSIVE_TEXTS:
+            result = self.config.process_incremental(prev_text, text)
+            prev_text = text
+        self.assertIn("groceries", result, "The last words typed should be kept")
+        self.assertLLMAnswered()
+
+    def test_same_text_repeated(self):
+        test_text = "this are a test"
+        result = self.config.nerd_dictation_process(test_text)
+        for _ in range(2):
+            self.assertEqual(self.config.nerd_dictation_process(test_text), result)
+        self.assertLessEqual(self.mock_request_llm.call_count, 1, "Repeated text should not be sent again")
+
+
+def main():
+    config = get_config()
+
+    print("Testing progressive typing scenario...")
+    print("This simulates how nerd-dictation processes text during live dictation")
+    print("=" * 70)
+
+    print("Simulating progressive typing...")
+    prev_text = ""
+    for i, text in enumerate(PROGRESSIVE_TEXTS):
+        # Only the words added since the last LLM request are sent to the LLM.
+        result = config.process_incremental(prev_text, text)
+        prev_text = text
+        print(f"Step {i+1:2d}: '{text}' → '{result}'")
+
+    print("\nTesting same text multiple times (should use cache)...")
+    test_text = "this are a test"
+    for i in range(3):
+        result = config.nerd_dictation_process(test_text)
+        print(f"Call {i+1}: '{test_text}' → '{result}'")
+
+    print("\n✓ Progressive typing test completed!")
+    print("Look for 'LLM improved' messages in the output above.")
+    print("Each unique text should only be processed once by the LLM.")
+
+
+if __name__ == "__main__":
+    main()